@@ -4,11 +4,13 @@ import click
 import poetry_version
 
 from . import readers
+from .history import RenderHistory
 from .utils import confirm_target_file, create_target_file, merge_with_presets, merge_with_prompts
+from .variables import SecretVariable
 from .writers import Writer
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
     "-s",
     "--skip-existing",
@@ -21,9 +23,19 @@ from .writers import Writer
 @click.option(
     "-z", "--zero-input", is_flag=True, help="Skip prompts and use presets verbatim. Useful for CI environments."
 )
+@click.option(
+    "--keep-history/--no-keep-history",
+    default=None,
+    help="Keep recent renders for rollback. Off by default when the template uses secrets.",
+)
 @click.version_option(poetry_version.extract(source_file=__file__))
-def barbara_develop(skip_existing, output, template, zero_input):
+@click.pass_context
+def barbara_develop(ctx, skip_existing, output, template, zero_input, keep_history):
     """Development mode which prompts for user input"""
+    ctx.obj = {"output": output}
+    if ctx.invoked_subcommand is not None:
+        return
+
     if zero_input:
         destination_handler = create_target_file
         merge_strategy = merge_with_presets
@@ -42,6 +54,32 @@ def barbara_develop(skip_existing, output, template, zero_input):
 
     environment = merge_strategy(existing_environment, environment_template["environment"], skip_existing)
 
-    Writer(confirmed_target, environment).write()
+    if keep_history is None:
+        # Stored renders are plaintext, so don't keep old secret values around unless asked to
+        keep_history = not any(isinstance(v, SecretVariable) for v in environment_template["environment"].values())
+
+    Writer(confirmed_target, environment, keep_history=keep_history).write()
 
     click.echo("Environment ready!")
+
+
+@barbara_develop.command()
+@click.pass_obj
+def history(obj):
+    """List recent renders of the env-file, newest first"""
+    output = obj["output"]
+    render_history = RenderHistory(output)
+    current = render_history.current_digest()
+    for entry in reversed(render_history.entries()):
+        marker = "*" if entry.digest == current else " "
+        click.echo(f"{marker} {entry.digest[:12]} {entry.timestamp}")
+
+
+@barbara_develop.command()
+@click.argument("revision", required=False)
+@click.pass_obj
+def rollback(obj, revision):
+    """Restore a previous render of the env-file, the one before the latest by default"""
+    output = obj["output"]
+    digest = RenderHistory(output).rollback(revision)
+    click.echo(f"Restored {output} to {digest[:12]}")
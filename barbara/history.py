@@ -0,0 +1,149 @@
+import hashlib
+import os
+import stat
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from click import ClickException
+
+#: Single render recorded in the history index
+HistoryEntry = namedtuple("HistoryEntry", ("timestamp", "digest"))
+
+
+def digest_of(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_temporary(directory: Path, prefix: str, content: bytes) -> Path:
+    """Write content to a uniquely named, owner-only temporary file in directory."""
+    fd, name = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return Path(name)
+
+
+class RenderHistory:
+    """Content-addressed store of recent renders, kept in a hidden directory next to the target file.
+
+    Each render is stored once as a blob named by its SHA-256 digest and the index records which blob was
+    installed when. Renders are written next to the target and renamed into place, so the working file never
+    shares storage with a blob. Symlinked targets are resolved and written through.
+    """
+
+    def __init__(self, target_file: Path, retain: int = 10) -> None:
+        self.target_file = Path(target_file).resolve()
+        name = self.target_file.name
+        self.root = self.target_file.parent / f"{'' if name.startswith('.') else '.'}{name}.history"
+        self.objects = self.root / "objects"
+        self.index_file = self.root / "index"
+        self.retain = retain
+
+    def entries(self) -> List[HistoryEntry]:
+        """Recorded renders, oldest first."""
+        if not self.index_file.exists():
+            return []
+        return [HistoryEntry(*line.split()) for line in self.index_file.read_text().splitlines() if line]
+
+    def current_digest(self) -> Optional[str]:
+        """Digest of the target file as it is on disk, or None when it does not exist."""
+        if not self.target_file.exists():
+            return None
+        return digest_of(self.target_file.read_bytes())
+
+    def _store(self, content: bytes) -> str:
+        """Store content as a blob, unless an identical one is already stored."""
+        digest = digest_of(content)
+        blob = self.objects / digest
+        if not blob.exists():
+            self.root.mkdir(mode=0o700, exist_ok=True)
+            self.objects.mkdir(mode=0o700, exist_ok=True)
+            os.replace(write_temporary(self.objects, f"{digest}.", content), blob)
+        return digest
+
+    def _record(self, digest: str) -> None:
+        """Append digest to the index, then drop renders beyond the retention limit."""
+        entries = self.entries()
+        if entries and entries[-1].digest == digest:
+            return
+        entries.append(HistoryEntry(datetime.now().isoformat(timespec="seconds"), digest))
+        self._save(entries[-self.retain :])
+
+    def _save(self, entries: List[HistoryEntry]) -> None:
+        index = "".join(f"{entry.timestamp} {entry.digest}\n" for entry in entries)
+        os.replace(write_temporary(self.root, "index.", index.encode("utf-8")), self.index_file)
+
+        referenced = set(entry.digest for entry in entries)
+        for blob in self.objects.iterdir():
+            # Temporary files belong to blobs another run is still storing
+            if blob.name not in referenced and blob.suffix != ".tmp":
+                blob.unlink()
+
+    def _install(self, content: bytes) -> None:
+        """Put content in place of the target with a single rename.
+
+        Targets which are new, hardlinked, owned by someone else or bind-mounted cannot be renamed over without
+        breaking them, so they are rewritten in place instead.
+        """
+        if not self.target_file.exists() or self.target_file.stat().st_nlink > 1:
+            self.target_file.write_bytes(content)
+            return
+
+        target_stat = self.target_file.stat()
+        temporary = write_temporary(self.target_file.parent, f".{self.target_file.name}.", content)
+        try:
+            os.chmod(temporary, stat.S_IMODE(target_stat.st_mode))
+            temporary_stat = temporary.stat()
+            if (temporary_stat.st_uid, temporary_stat.st_gid) != (target_stat.st_uid, target_stat.st_gid):
+                os.chown(temporary, target_stat.st_uid, target_stat.st_gid)
+            os.replace(temporary, self.target_file)
+        except OSError:
+            temporary.unlink()
+            self.target_file.write_bytes(content)
+
+    def snapshot(self) -> None:
+        """Record the target as it is on disk, so renders made outside barbara are not lost.
+
+        Empty targets are skipped, they are only placeholders created ahead of the first render.
+        """
+        if not self.target_file.exists():
+            return
+        content = self.target_file.read_bytes()
+        entries = self.entries()
+        if content and (not entries or entries[-1].digest != digest_of(content)):
+            self._record(self._store(content))
+
+    def write(self, content: bytes) -> str:
+        """Record and install a new render of the target."""
+        self.snapshot()
+        digest = self._store(content)
+        self._record(digest)
+        self._install(content)
+        return digest
+
+    def resolve(self, revision: Optional[str] = None) -> str:
+        """Find the digest for a revision prefix, defaulting to the render before the latest one."""
+        entries = self.entries()
+        if revision is None:
+            if len(entries) < 2:
+                raise ClickException(f"No previous render of {self.target_file} to roll back to")
+            return entries[-2].digest
+
+        matches = set(entry.digest for entry in entries if revision and entry.digest.startswith(revision))
+        if len(matches) != 1:
+            reason = "Ambiguous" if matches else "Unknown"
+            raise ClickException(f"{reason} revision for {self.target_file}: {revision}")
+        return matches.pop()
+
+    def rollback(self, revision: Optional[str] = None) -> str:
+        """Restore a previous render of the target without re-running the template."""
+        self.snapshot()
+        digest = self.resolve(revision)
+        content = (self.objects / digest).read_bytes()
+        if digest_of(content) != digest:
+            raise ClickException(f"Render {digest[:12]} of {self.target_file} has been modified, refusing to restore")
+        self._record(digest)
+        self._install(content)
+        return digest
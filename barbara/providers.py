@@ -0,0 +1,249 @@
+import abc
+import http.client
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit
+
+import yaml
+from click import ClickException, FileError
+
+#: Registered secret providers, keyed by the name used in ``@@SECRET:<name>/<path>@@``
+SECRET_PROVIDERS = {}
+
+#: Provider instances are shared for the lifetime of the process so connections can be reused
+_PROVIDER_INSTANCES = {}
+
+#: Created on first use so bad cache settings are reported like any other CLI error
+_SECRET_CACHE = None
+
+MISSING = object()
+
+#: Only leaf values can be written to an env-file; mappings, lists and nulls are never secrets
+SECRET_TYPES = (str, int, float, bool)
+
+
+class TTLCache:
+    """Bounded in-memory cache which forgets values after a fixed time-to-live."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        try:
+            expires_at, value = self._entries[key]
+        except KeyError:
+            return default
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _cache_setting(name: str, default: str, cast: type):
+    value = os.environ.get(name, default)
+    try:
+        result = cast(value)
+    except ValueError:
+        result = -1
+    if result < 0:
+        raise ClickException(f"{name} must be a non-negative number, found: {value}")
+    return result
+
+
+def get_cache() -> TTLCache:
+    """Return the shared secret cache, configured from the environment."""
+    global _SECRET_CACHE
+    if _SECRET_CACHE is None:
+        _SECRET_CACHE = TTLCache(
+            maxsize=_cache_setting("BARBARA_SECRETS_CACHE_SIZE", "256", int),
+            ttl=_cache_setting("BARBARA_SECRETS_CACHE_TTL", "300", float),
+        )
+    return _SECRET_CACHE
+
+
+class BaseSecretProvider(metaclass=abc.ABCMeta):
+    """Fetches secrets in batches from a single backend.
+
+    Subclasses register themselves under ``NAME`` and implement ``fetch_many``.
+    """
+
+    NAME = None
+    BATCH_SIZE = 50
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.NAME is not None:
+            SECRET_PROVIDERS[cls.NAME] = cls
+
+    @abc.abstractmethod
+    def fetch_many(self, paths: List[str]) -> Dict[str, str]:
+        """Fetch a batch of secrets. Paths which cannot be found are left out of the result."""
+        return NotImplemented
+
+    def close(self) -> None:
+        """Release any resources held by the provider."""
+
+
+class FileSecretProvider(BaseSecretProvider):
+    """Reads secrets from a local YAML or JSON file, walking nested mappings by path segment.
+
+    The file is taken from ``BARBARA_SECRETS_FILE`` and defaults to ``secrets.yml``. Intended as an offline
+    stand-in for a real secret store.
+    """
+
+    NAME = "file"
+
+    def __init__(self, source: Path = None) -> None:
+        self.source = Path(source or os.environ.get("BARBARA_SECRETS_FILE", "secrets.yml"))
+        self._secrets = None
+
+    def _load(self) -> Dict:
+        if self._secrets is None:
+            try:
+                self._secrets = yaml.safe_load(self.source.read_text()) or {}
+            except FileNotFoundError:
+                raise FileError(str(self.source), hint=f"secret provider {self.NAME} could not find it")
+            except yaml.YAMLError as e:
+                raise FileError(str(self.source), hint=f"secret provider {self.NAME} could not parse it: {e}")
+        return self._secrets
+
+    def fetch_many(self, paths: List[str]) -> Dict[str, str]:
+        secrets = self._load()
+        found = {}
+        for path in paths:
+            value = secrets
+            for segment in path.split("/"):
+                if not isinstance(value, dict) or segment not in value:
+                    break
+                value = value[segment]
+            else:
+                if isinstance(value, SECRET_TYPES):
+                    found[path] = str(value)
+        return found
+
+
+class HTTPSecretProvider(BaseSecretProvider):
+    """Fetches secrets from an HTTP endpoint over a single kept-alive connection.
+
+    Each batch is sent to ``BARBARA_SECRETS_URL`` as a JSON ``POST`` of ``{"paths": [...]}`` and the
+    endpoint replies with a JSON object mapping each known path to its value.
+    """
+
+    NAME = "http"
+
+    def __init__(self, url: str = None, timeout: float = 10.0) -> None:
+        url = url or os.environ.get("BARBARA_SECRETS_URL")
+        if not url:
+            raise ClickException(f"Secret provider {self.NAME} requires BARBARA_SECRETS_URL to be set")
+        self.url = urlsplit(url)
+        self.timeout = timeout
+        self._connection = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            connection_class = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+            self._connection = connection_class(self.url.netloc, timeout=self.timeout)
+        return self._connection
+
+    def _post(self, body: bytes) -> Tuple[int, bytes]:
+        path = self.url.path or "/"
+        if self.url.query:
+            path = f"{path}?{self.url.query}"
+        connection = self._connect()
+        connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def fetch_many(self, paths: List[str]) -> Dict[str, str]:
+        body = json.dumps({"paths": paths}).encode("utf-8")
+        try:
+            status, payload = self._post(body)
+        except (http.client.HTTPException, OSError):
+            # Server dropped the kept-alive connection, retry once on a fresh one
+            self.close()
+            try:
+                status, payload = self._post(body)
+            except (http.client.HTTPException, OSError) as e:
+                self.close()
+                raise ClickException(f"Secret provider {self.NAME} could not reach {self.url.geturl()}: {e}")
+        if status != 200:
+            raise ClickException(f"Secret provider {self.NAME} at {self.url.geturl()} responded with {status}")
+        try:
+            secrets = json.loads(payload)
+        except ValueError:
+            secrets = None
+        if not isinstance(secrets, dict):
+            raise ClickException(
+                f"Secret provider {self.NAME} at {self.url.geturl()} did not respond with a JSON object"
+            )
+        return {path: str(value) for path, value in secrets.items() if isinstance(value, SECRET_TYPES)}
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def get_provider(name: str) -> BaseSecretProvider:
+    """Return the shared provider instance registered under name."""
+    if name not in _PROVIDER_INSTANCES:
+        try:
+            provider_class = SECRET_PROVIDERS[name]
+        except KeyError:
+            raise ClickException(f"Unknown secret provider: {name}")
+        _PROVIDER_INSTANCES[name] = provider_class()
+    return _PROVIDER_INSTANCES[name]
+
+
+def prefetch(name: str, paths: Iterable[str]) -> Dict[str, str]:
+    """Return every secret found for paths, fetching uncached ones from provider name in batches.
+
+    The cache only saves repeat requests; fetched values are returned directly so they survive eviction.
+    """
+    cache = get_cache()
+    found = {}
+    missing = []
+    for path in sorted(set(paths)):
+        value = cache.get((name, path), MISSING)
+        if value is MISSING:
+            missing.append(path)
+        else:
+            found[path] = value
+
+    if missing:
+        provider = get_provider(name)
+        for start in range(0, len(missing), provider.BATCH_SIZE):
+            for path, value in provider.fetch_many(missing[start : start + provider.BATCH_SIZE]).items():
+                cache.set((name, path), value)
+                found[path] = value
+    return found
+
+
+def get_secret(name: str, path: str) -> str:
+    """Return a single secret, fetching it if it has not been cached yet."""
+    try:
+        return prefetch(name, [path])[path]
+    except KeyError:
+        raise ClickException(f"Secret not found: {name}/{path}")
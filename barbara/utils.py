@@ -1,5 +1,6 @@
 import os
 import sys
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Union
 
@@ -54,6 +55,18 @@ def merge_keys(
     return sorted(merged_keys)
 
 
+def prepare_auto_variables(template: Dict[str, Union[EnvVariable, AutoVariable]], keys: List[str]) -> None:
+    """Let each AutoVariable type prepare the variables about to be generated in a single batch."""
+    batches = defaultdict(list)
+    for key in keys:
+        variable = template.get(key)
+        if isinstance(variable, AutoVariable):
+            batches[type(variable)].append(variable)
+
+    for var_type, variables in batches.items():
+        var_type.prepare(variables)
+
+
 def merge_with_presets(
     existing: Dict[str, str], template: Dict[str, Union[EnvVariable, AutoVariable]], skip_existing: bool
 ) -> Dict[str, str]:
@@ -63,8 +76,10 @@ def merge_with_presets(
     value will be used as the preset, when the key doesn't exist the template preset is assigned.
     """
     merged = existing.copy()
+    keys = merge_keys(existing, template, skip_existing)
+    prepare_auto_variables(template, keys)
 
-    for key in merge_keys(existing, template, skip_existing):
+    for key in keys:
         if isinstance(template.get(key), AutoVariable):
             merged[key] = template[key].generate()
         elif existing.get(key, EMPTY) is not EMPTY:
@@ -86,8 +101,10 @@ def merge_with_prompts(
     value will be given as a preset, when the key doesn't exist the template preset is presented.
     """
     merged = existing.copy()
+    keys = merge_keys(existing, template, skip_existing)
+    prepare_auto_variables(template, keys)
 
-    for key in merge_keys(existing, template, skip_existing):
+    for key in keys:
         if isinstance(template.get(key), AutoVariable):
             merged[key] = template[key].generate()
         else:
@@ -1,9 +1,12 @@
 import abc
 import re
 import subprocess
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+from typing import List
 from typing.re import Pattern
 
+from . import providers
+
 #: Basic environment variable with a preset value
 EnvVariable = namedtuple("EnvVariable", ("name", "preset"))
 
@@ -23,6 +26,10 @@ class AutoVariable(metaclass=abc.ABCMeta):
         """Compiled regular expression which matches this AutoVariable in the template."""
         return NotImplemented
 
+    @classmethod
+    def prepare(cls, variables: List["AutoVariable"]) -> None:
+        """Prepare all variables of this type in bulk before any of them are generated."""
+
     def validate(self) -> bool:
         """Validate template parameters, if necessary."""
         return NotImplemented
@@ -59,3 +66,41 @@ class GitCommitVariable(AutoVariable):
             return git_revision[hash_size]
         except subprocess.CalledProcessError:
             return "UNKNOWN"
+
+
+class SecretVariable(AutoVariable):
+    """Replaced with a secret fetched from a provider when generating an env-file."""
+
+    MATCHER = re.compile(r"^@@SECRET:(?P<parameter>[A-Za-z0-9_-]+/[^@]+)@@$")
+
+    def __init__(self, name: str, reference: str):
+        self.name = name
+        self.provider, self.path = reference.split("/", 1)
+        self.value = None
+
+    def __eq__(self, other):
+        return all((self.name == other.name, self.provider == other.provider, self.path == other.path))
+
+    def __repr__(self):
+        return f"SecretVariable(name='{self.name}', reference='{self.provider}/{self.path}')"
+
+    @classmethod
+    def prepare(cls, variables):
+        """Fetch all referenced secrets in batches, one round of requests per provider."""
+        variables_by_provider = defaultdict(list)
+        for variable in variables:
+            variables_by_provider[variable.provider].append(variable)
+        for provider, provider_variables in variables_by_provider.items():
+            found = providers.prefetch(provider, [variable.path for variable in provider_variables])
+            for variable in provider_variables:
+                variable.value = found.get(variable.path)
+
+    def validate(self):
+        """Provider must be registered."""
+        assert self.provider in providers.SECRET_PROVIDERS
+
+    def generate(self):
+        """Use the prepared secret, looking it up when it was not fetched in a batch."""
+        if self.value is None:
+            self.value = providers.get_secret(self.provider, self.path)
+        return self.value
@@ -1,25 +1,24 @@
-import os
-import shutil
 from pathlib import Path
 from typing import Dict
 
+from .history import RenderHistory
+
 
 class Writer:
-    """Writes new environment to target file, preserving the original in a backup during the write."""
+    """Writes new environment to target file, recording each render in the target's history if kept."""
 
-    def __init__(self, target_file: Path, environment: Dict[str, str]):
+    def __init__(self, target_file: Path, environment: Dict[str, str], keep_history: bool = True):
         self.target_file = target_file
         self.environment = environment
+        self.keep_history = keep_history
 
-    def write(self):
-        backup_file = Path(f"{self.target_file}.backup")
-        shutil.copy2(self.target_file, backup_file)
-
-        with self.target_file.open("w", encoding="utf-8") as f:
-            f.seek(0)
-            for k, v in self.environment.items():
-                # Normalize falsy values to blanks
-                v = "" if not v else v
-                f.write(f"{k}={v}\n")
+    def render(self) -> str:
+        # Normalize falsy values to blanks
+        return "".join(f"{k}={'' if not v else v}\n" for k, v in self.environment.items())
 
-        os.remove(backup_file)
+    def write(self):
+        content = self.render().encode("utf-8")
+        if self.keep_history:
+            RenderHistory(self.target_file).write(content)
+        else:
+            self.target_file.write_bytes(content)
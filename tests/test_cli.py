@@ -0,0 +1,80 @@
+import pytest
+from click.testing import CliRunner
+
+from barbara import providers
+from barbara.cli import barbara_develop
+from barbara.history import RenderHistory
+
+
+@pytest.fixture(name="runner")
+def create_runner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return CliRunner()
+
+
+@pytest.fixture(name="renders")
+def create_renders(tmp_path):
+    history = RenderHistory(tmp_path / "ci.env")
+    return [history.write(b"A=1\n"), history.write(b"A=2\n")]
+
+
+def test_history(runner, renders):
+    """Should list renders of the env-file given to the group, newest first"""
+    result = runner.invoke(barbara_develop, ["-o", "ci.env", "history"])
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert lines[0].startswith(f"* {renders[1][:12]}")
+    assert lines[1].startswith(f"  {renders[0][:12]}")
+
+
+def test_history__default_output(runner, renders):
+    """Should not show history of other env-files"""
+    result = runner.invoke(barbara_develop, ["history"])
+    assert result.exit_code == 0, result.output
+    assert result.output == ""
+
+
+def test_rollback(runner, renders, tmp_path):
+    """Should roll back the env-file given to the group"""
+    (tmp_path / ".env").write_text("UNTOUCHED=1\n")
+    result = runner.invoke(barbara_develop, ["-o", "ci.env", "rollback"])
+    assert result.exit_code == 0, result.output
+    assert f"Restored ci.env to {renders[0][:12]}" in result.output
+    assert (tmp_path / "ci.env").read_text() == "A=1\n"
+    assert (tmp_path / ".env").read_text() == "UNTOUCHED=1\n"
+
+
+def test_rollback__unknown_revision(runner, renders):
+    """Should report unknown revisions without a traceback"""
+    result = runner.invoke(barbara_develop, ["-o", "ci.env", "rollback", ""])
+    assert result.exit_code == 1
+    assert "Unknown revision" in result.output
+
+
+@pytest.fixture(name="secret_template")
+def create_secret_template(tmp_path, monkeypatch):
+    monkeypatch.setattr(providers, "_PROVIDER_INSTANCES", {})
+    monkeypatch.setattr(providers, "_SECRET_CACHE", None)
+    (tmp_path / "secrets.yml").write_text("db:\n  password: hunter2\n")
+    (tmp_path / "env-template.yml").write_text(
+        """
+    schema-version: 2
+    environment:
+      DATABASE_PASSWORD: "@@SECRET:file/db/password@@"
+    """
+    )
+
+
+def test_render_with_secrets_skips_history(runner, secret_template, tmp_path):
+    """Should not keep plaintext secrets in history unless asked to"""
+    result = runner.invoke(barbara_develop, ["-z"])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / ".env").read_text() == "DATABASE_PASSWORD=hunter2\n"
+    assert not RenderHistory(tmp_path / ".env").root.exists()
+
+
+def test_render_with_secrets_keep_history(runner, secret_template, tmp_path):
+    """Should keep history for templates with secrets when asked to"""
+    result = runner.invoke(barbara_develop, ["-z", "--keep-history"])
+    assert result.exit_code == 0, result.output
+    assert len(RenderHistory(tmp_path / ".env").entries()) == 1
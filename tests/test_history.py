@@ -0,0 +1,187 @@
+import os
+import stat
+from unittest import mock
+
+import pytest
+from click import ClickException
+
+from barbara.history import RenderHistory
+
+
+@pytest.fixture(name="env_file")
+def create_env_file(tmp_path):
+    return tmp_path / ".env"
+
+
+def test_write_deduplicates(env_file):
+    """Should store identical renders once and not record repeats"""
+    history = RenderHistory(env_file)
+    history.write(b"A=1\n")
+    history.write(b"A=1\n")
+    history.write(b"A=2\n")
+    history.write(b"A=1\n")
+
+    assert len(history.entries()) == 3
+    assert len(list(history.objects.iterdir())) == 2
+    assert env_file.read_bytes() == b"A=1\n"
+
+
+def test_write_copies(env_file):
+    """Should not share storage between the env-file and its blob"""
+    digest = RenderHistory(env_file).write(b"A=1\n")
+    assert not env_file.samefile(RenderHistory(env_file).objects / digest)
+
+
+def test_edit_in_place_then_rollback(env_file):
+    """Should keep renders intact when the env-file is edited in place"""
+    history = RenderHistory(env_file)
+    history.write(b"A=1\n")
+    second = history.write(b"A=2\n")
+    with env_file.open("a") as f:
+        f.write("B=3\n")
+
+    assert history.rollback(second[:8]) == second
+    assert env_file.read_bytes() == b"A=2\n"
+    history.rollback()
+    assert env_file.read_bytes() == b"A=2\nB=3\n"
+
+
+def test_write_through_symlink(tmp_path):
+    """Should update the file a symlinked env-file points at"""
+    real_file = tmp_path / "shared" / "real.env"
+    real_file.parent.mkdir()
+    real_file.write_text("X=1\n")
+    link = tmp_path / "link.env"
+    link.symlink_to(real_file)
+
+    RenderHistory(link).write(b"X=2\n")
+    assert link.is_symlink()
+    assert real_file.read_text() == "X=2\n"
+
+
+def test_skip_empty_placeholder(env_file):
+    """Should not record the empty file created ahead of the first render"""
+    env_file.touch()
+    history = RenderHistory(env_file)
+    history.write(b"A=1\n")
+
+    assert len(history.entries()) == 1
+    with pytest.raises(ClickException, match="No previous render"):
+        history.rollback()
+
+
+def test_snapshot_existing(env_file):
+    """Should record content written outside barbara before replacing it"""
+    env_file.write_bytes(b"MANUAL=1\n")
+    history = RenderHistory(env_file)
+    history.write(b"A=1\n")
+
+    history.rollback()
+    assert env_file.read_bytes() == b"MANUAL=1\n"
+
+
+def test_retention(env_file):
+    """Should keep only the most recent renders and drop unreferenced blobs"""
+    history = RenderHistory(env_file, retain=2)
+    for value in range(5):
+        history.write(f"A={value}\n".encode("utf-8"))
+
+    assert len(history.entries()) == 2
+    assert len(list(history.objects.iterdir())) == 2
+
+
+def test_rollback_previous(env_file):
+    """Should restore the render before the latest one"""
+    history = RenderHistory(env_file)
+    first = history.write(b"A=1\n")
+    history.write(b"A=2\n")
+
+    assert history.rollback() == first
+    assert env_file.read_bytes() == b"A=1\n"
+    assert history.entries()[-1].digest == first
+
+
+def test_rollback_revision(env_file):
+    """Should restore a render by digest prefix"""
+    history = RenderHistory(env_file)
+    first = history.write(b"A=1\n")
+    history.write(b"A=2\n")
+    history.write(b"A=3\n")
+
+    history.rollback(first[:8])
+    assert env_file.read_bytes() == b"A=1\n"
+
+
+def test_rollback_unknown(env_file):
+    """Should refuse revisions which are not in history"""
+    history = RenderHistory(env_file)
+    history.write(b"A=1\n")
+
+    with pytest.raises(ClickException, match="No previous render"):
+        history.rollback()
+    with pytest.raises(ClickException, match="Unknown revision"):
+        history.rollback("0000")
+    with pytest.raises(ClickException, match="Unknown revision"):
+        history.rollback("")
+
+
+def test_history_directory(tmp_path):
+    """Should name the history after the env-file without doubling the dot, readable only by its owner"""
+    dotted = RenderHistory(tmp_path / ".env")
+    dotted.write(b"A=1\n")
+    plain = RenderHistory(tmp_path / "ci.env")
+    plain.write(b"A=1\n")
+
+    assert dotted.root == tmp_path / ".env.history"
+    assert plain.root == tmp_path / ".ci.env.history"
+    assert stat.S_IMODE(dotted.root.stat().st_mode) == 0o700
+    assert stat.S_IMODE(dotted.objects.stat().st_mode) == 0o700
+
+
+def test_prune_skips_temporary_files(env_file):
+    """Should not remove blobs which another run is still storing"""
+    history = RenderHistory(env_file, retain=1)
+    history.write(b"A=1\n")
+    in_flight = history.objects / "0123.abcd.tmp"
+    in_flight.write_bytes(b"A=2\n")
+    history.write(b"A=3\n")
+
+    assert in_flight.exists()
+
+
+def test_write_keeps_mode(env_file):
+    """Should keep the permissions of the env-file it replaces"""
+    env_file.write_bytes(b"A=1\n")
+    env_file.chmod(0o640)
+    RenderHistory(env_file).write(b"A=2\n")
+
+    assert stat.S_IMODE(env_file.stat().st_mode) == 0o640
+
+
+def test_write_hardlinked_target_in_place(env_file, tmp_path):
+    """Should rewrite hardlinked env-files in place so every link sees the new render"""
+    env_file.write_bytes(b"A=1\n")
+    other = tmp_path / "other.env"
+    os.link(env_file, other)
+    RenderHistory(env_file).write(b"A=2\n")
+
+    assert env_file.samefile(other)
+    assert other.read_bytes() == b"A=2\n"
+
+
+def test_write_falls_back_in_place(env_file):
+    """Should rewrite env-files in place when they cannot be renamed over, e.g. bind mounts"""
+    env_file.write_bytes(b"A=1\n")
+    history = RenderHistory(env_file)
+    replace = os.replace
+
+    def busy_target(source, destination):
+        if destination == history.target_file:
+            raise OSError(16, "Device or resource busy")
+        replace(source, destination)
+
+    with mock.patch("barbara.history.os.replace", side_effect=busy_target):
+        history.write(b"A=2\n")
+
+    assert env_file.read_bytes() == b"A=2\n"
+    assert not list(env_file.parent.glob(".env.*.tmp"))
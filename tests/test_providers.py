@@ -0,0 +1,229 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+from click import ClickException
+
+from barbara import providers
+
+
+@pytest.fixture(autouse=True)
+def reset_providers(monkeypatch):
+    monkeypatch.setattr(providers, "_SECRET_CACHE", None)
+    providers._PROVIDER_INSTANCES.clear()
+    yield
+    for provider in providers._PROVIDER_INSTANCES.values():
+        provider.close()
+    providers._PROVIDER_INSTANCES.clear()
+
+
+@pytest.fixture(name="secrets_file")
+def create_secrets_file(tmp_path, monkeypatch):
+    path = tmp_path / "secrets.yml"
+    path.write_text(
+        """
+    db:
+      password: hunter2
+      port: 5432
+    api-key: abc123
+    nul: ~
+    """
+    )
+    monkeypatch.setenv("BARBARA_SECRETS_FILE", str(path))
+    return path
+
+
+class Requests(list):
+    server = None
+
+
+@pytest.fixture(name="secrets_server")
+def create_secrets_server(monkeypatch):
+    secrets = {"db/password": "hunter2", "api-key": "abc123", "nul": None, "db": {"password": "hunter2"}}
+    requests = Requests()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            paths = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["paths"]
+            requests.append((self.client_address, self.path, paths))
+            # Drop kept-alive connections after answering when asked to, without telling the client
+            self.close_connection = getattr(self.server, "drop_connections", False)
+            body = getattr(self.server, "raw_body", None)
+            if body is None:
+                body = json.dumps({path: secrets[path] for path in paths if path in secrets}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("BARBARA_SECRETS_URL", f"http://127.0.0.1:{server.server_port}/secrets")
+    requests.server = server
+    yield requests
+    server.shutdown()
+    server.server_close()
+
+
+class TestTTLCache:
+    def test_get_and_set(self):
+        """Should return stored values and the default for unknown keys"""
+        cache = providers.TTLCache()
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        assert cache.get("missing", "default") == "default"
+
+    @mock.patch("barbara.providers.time.monotonic")
+    def test_expires(self, patched_monotonic):
+        """Should forget values once their time-to-live has passed"""
+        patched_monotonic.return_value = 100.0
+        cache = providers.TTLCache(ttl=10)
+        cache.set("key", "value")
+
+        patched_monotonic.return_value = 109.0
+        assert "key" in cache
+
+        patched_monotonic.return_value = 110.0
+        assert "key" not in cache
+        assert len(cache) == 0
+
+    def test_bounded(self):
+        """Should evict the least recently used value when full"""
+        cache = providers.TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+
+def test_intermediate_provider_not_registered():
+    """Should only register providers which declare a name"""
+
+    class IntermediateProvider(providers.BaseSecretProvider):
+        pass
+
+    assert None not in providers.SECRET_PROVIDERS
+    assert IntermediateProvider not in providers.SECRET_PROVIDERS.values()
+
+
+class TestFileSecretProvider:
+    def test_fetch_many(self, secrets_file):
+        """Should walk nested mappings and leave out unknown paths"""
+        found = providers.FileSecretProvider().fetch_many(["db/password", "db/port", "api-key", "db/missing"])
+        assert found == {"db/password": "hunter2", "db/port": "5432", "api-key": "abc123"}
+
+    @pytest.mark.parametrize("path", ["db", "nul"])
+    def test_get_secret__not_a_leaf(self, secrets_file, path):
+        """Should not write mappings or nulls into the env-file"""
+        with pytest.raises(ClickException, match=f"Secret not found: file/{path}"):
+            providers.get_secret("file", path)
+
+    def test_get_secret__malformed_file(self, secrets_file):
+        """Should report secrets files which cannot be parsed"""
+        secrets_file.write_text("db: [unclosed")
+        with pytest.raises(ClickException) as excinfo:
+            providers.get_secret("file", "db/password")
+        assert "could not parse" in excinfo.value.format_message()
+
+    def test_get_secret(self, secrets_file):
+        """Should fetch secret through the registered provider"""
+        assert providers.get_secret("file", "db/password") == "hunter2"
+
+    def test_get_secret__missing(self, secrets_file):
+        """Should fail loudly rather than write a blank secret"""
+        with pytest.raises(ClickException, match="file/db/missing"):
+            providers.get_secret("file", "db/missing")
+
+    def test_get_secret__missing_file(self, tmp_path, monkeypatch):
+        """Should report the secrets file which could not be found"""
+        monkeypatch.setenv("BARBARA_SECRETS_FILE", str(tmp_path / "missing.yml"))
+        with pytest.raises(ClickException) as excinfo:
+            providers.get_secret("file", "db/password")
+        assert "missing.yml" in excinfo.value.format_message()
+
+    def test_get_secret__unknown_provider(self):
+        """Should reject providers which are not registered"""
+        with pytest.raises(ClickException, match="Unknown secret provider"):
+            providers.get_secret("unknown", "db/password")
+
+    @pytest.mark.parametrize("setting", ["BARBARA_SECRETS_CACHE_SIZE", "BARBARA_SECRETS_CACHE_TTL"])
+    def test_prefetch__cache_disabled(self, secrets_file, monkeypatch, setting):
+        """Should return fetched secrets even when the cache cannot hold them"""
+        monkeypatch.setenv(setting, "0")
+        assert providers.prefetch("file", ["db/password", "api-key"]) == {"db/password": "hunter2", "api-key": "abc123"}
+        assert providers.get_secret("file", "db/password") == "hunter2"
+
+    def test_invalid_cache_setting(self, secrets_file, monkeypatch):
+        """Should reject cache settings which are not numbers"""
+        monkeypatch.setenv("BARBARA_SECRETS_CACHE_SIZE", "lots")
+        with pytest.raises(ClickException, match="BARBARA_SECRETS_CACHE_SIZE"):
+            providers.get_secret("file", "db/password")
+
+
+class TestHTTPSecretProvider:
+    def test_prefetch_batches(self, secrets_server, monkeypatch):
+        """Should fetch all paths in batches over a single connection"""
+        monkeypatch.setattr(providers.HTTPSecretProvider, "BATCH_SIZE", 2)
+        providers.prefetch("http", ["db/password", "api-key", "db/missing"])
+
+        assert [paths for _, _, paths in secrets_server] == [["api-key", "db/missing"], ["db/password"]]
+        assert len(set(client for client, _, _ in secrets_server)) == 1
+
+    def test_prefetch_retries_dropped_connection(self, secrets_server, monkeypatch):
+        """Should reconnect once when the server closes the kept-alive connection between batches"""
+        monkeypatch.setattr(providers.HTTPSecretProvider, "BATCH_SIZE", 1)
+        secrets_server.server.drop_connections = True
+        found = providers.prefetch("http", ["db/password", "api-key"])
+
+        assert found == {"db/password": "hunter2", "api-key": "abc123"}
+        assert [paths for _, _, paths in secrets_server] == [["api-key"], ["db/password"]]
+        assert len(set(client for client, _, _ in secrets_server)) == 2
+
+    def test_prefetch_unreachable(self, monkeypatch):
+        """Should report a provider which cannot be reached"""
+        monkeypatch.setenv("BARBARA_SECRETS_URL", "http://127.0.0.1:1/secrets")
+        with pytest.raises(ClickException, match="could not reach"):
+            providers.prefetch("http", ["db/password"])
+
+    def test_keeps_query_string(self, secrets_server, monkeypatch):
+        """Should send the query string from the configured URL"""
+        monkeypatch.setenv("BARBARA_SECRETS_URL", f"{providers.os.environ['BARBARA_SECRETS_URL']}?env=ci")
+        providers.prefetch("http", ["api-key"])
+        assert secrets_server[0][1] == "/secrets?env=ci"
+
+    @pytest.mark.parametrize("path", ["db", "nul"])
+    def test_get_secret__not_a_leaf(self, secrets_server, path):
+        """Should not write objects or nulls into the env-file"""
+        with pytest.raises(ClickException, match=f"Secret not found: http/{path}"):
+            providers.get_secret("http", path)
+
+    @pytest.mark.parametrize("body", [b"<html>Proxy error</html>", b'["hunter2"]'])
+    def test_get_secret__not_a_json_object(self, secrets_server, body):
+        """Should report responses which are not a JSON object"""
+        secrets_server.server.raw_body = body
+        with pytest.raises(ClickException, match="did not respond with a JSON object"):
+            providers.get_secret("http", "api-key")
+
+    def test_missing_url(self, monkeypatch):
+        """Should explain which setting is missing"""
+        monkeypatch.delenv("BARBARA_SECRETS_URL", raising=False)
+        with pytest.raises(ClickException, match="BARBARA_SECRETS_URL"):
+            providers.get_secret("http", "api-key")
+
+    def test_get_secret_uses_cache(self, secrets_server):
+        """Should not request secrets which have already been fetched"""
+        providers.prefetch("http", ["db/password", "api-key"])
+        assert providers.get_secret("http", "db/password") == "hunter2"
+        assert providers.get_secret("http", "api-key") == "abc123"
+        assert len(secrets_server) == 1
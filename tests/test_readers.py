@@ -1,5 +1,5 @@
 from barbara import readers
-from barbara.variables import GitCommitVariable
+from barbara.variables import GitCommitVariable, SecretVariable
 
 
 class TestEnvReader:
@@ -168,3 +168,19 @@ class TestYAMLConfigReader:
         template = reader.read()["environment"]
         assert "COMMIT" in template
         assert not isinstance(template["COMMIT"], GitCommitVariable)
+
+    def test_find_secret(self, tmp_path):
+        """Should detect secret references and split out the provider."""
+        path = tmp_path / "env-template.yml"
+        path.write_text(
+            """
+        schema-version: 2.0
+        environment:
+          DATABASE_PASSWORD: "@@SECRET:file/db/password@@"
+        """
+        )
+        reader = readers.YAMLTemplateReader(path)
+        template = reader.read()["environment"]
+        assert template["DATABASE_PASSWORD"] == SecretVariable("DATABASE_PASSWORD", "file/db/password")
+        assert template["DATABASE_PASSWORD"].provider == "file"
+        assert template["DATABASE_PASSWORD"].path == "db/password"
@@ -3,7 +3,7 @@ from unittest import mock
 import pytest
 
 from barbara import utils
-from barbara.variables import EnvVariable, GitCommitVariable
+from barbara.variables import EnvVariable, GitCommitVariable, SecretVariable
 
 
 @pytest.fixture(name="template")
@@ -187,3 +187,23 @@ class TestAutoVariableMerges:
         expected_length = auto_var_template["D"].length
         mock_commit_hash = patched_subprocess_output.return_value
         assert merged["D"] == mock_commit_hash[expected_length]
+
+
+class TestSecretVariableMerges:
+    @mock.patch("barbara.variables.providers")
+    def test_merge_with_presets_prefetches_per_provider(self, patched_providers):
+        """Should fetch all secrets for each provider in one batch before generating values"""
+        template = {
+            "A": SecretVariable("A", "file/db/password"),
+            "B": SecretVariable("B", "http/api-key"),
+            "C": SecretVariable("C", "file/db/user"),
+        }
+        patched_providers.prefetch.side_effect = lambda provider, paths: {path: f"{provider}:{path}" for path in paths}
+        merged = utils.merge_with_presets({}, template, skip_existing=True)
+
+        patched_providers.prefetch.assert_has_calls(
+            [mock.call("file", ["db/password", "db/user"]), mock.call("http", ["api-key"])]
+        )
+        assert patched_providers.prefetch.call_count == 2
+        assert merged == {"A": "file:db/password", "B": "http:api-key", "C": "file:db/user"}
+        patched_providers.get_secret.assert_not_called()
@@ -1,22 +1,29 @@
-from unittest import mock
-
+from barbara.history import RenderHistory
 from barbara.writers import Writer
 
 
-@mock.patch("barbara.writers.os")
-@mock.patch("barbara.writers.shutil")
-def test_writer_writes(patched_shutil, patched_os):
-    """Should open the target file and write to it"""
-    env_file = mock.MagicMock()
-    Writer(env_file, {"test-key": "test-value"}).write()
-    env_file.open().__enter__().write.assert_called()
+def test_writer_writes(tmp_path):
+    """Should write the environment to the target file"""
+    env_file = tmp_path / ".env"
+    Writer(env_file, {"test-key": "test-value", "empty": None}).write()
+    assert env_file.read_text() == "test-key=test-value\nempty=\n"
 
 
-@mock.patch("barbara.writers.shutil")
-@mock.patch("barbara.writers.os")
-def test_writer_backup(patched_os, patched_shutil):
-    """Should backup and then clean up backup when writing"""
-    env_file = mock.MagicMock()
+def test_writer_history(tmp_path):
+    """Should keep the original and the new render in history instead of a backup copy"""
+    env_file = tmp_path / ".env"
+    env_file.write_text("original=value\n")
     Writer(env_file, {"test-key": "test-value"}).write()
-    patched_shutil.copy2.assert_called()
-    patched_os.remove.assert_called()
+
+    assert not (tmp_path / ".env.backup").exists()
+    assert len(RenderHistory(env_file).entries()) == 2
+
+
+def test_writer_without_history(tmp_path):
+    """Should write the environment without keeping renders when history is turned off"""
+    env_file = tmp_path / ".env"
+    env_file.write_text("original=value\n")
+    Writer(env_file, {"test-key": "test-value"}, keep_history=False).write()
+
+    assert env_file.read_text() == "test-key=test-value\n"
+    assert not RenderHistory(env_file).root.exists()